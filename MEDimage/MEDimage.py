@@ -1370,24 +1370,12 @@ class MEDimage(object):
                 min_Zgrid = min_grid[2]
                 size_image = np.shape(nifti_data)
                 spatialRef = imref3d(size_image, abs(pixelX), abs(pixelY), abs(sliceS))
-                spatialRef.XWorldLimits = (np.array(spatialRef.XWorldLimits) -
-                                        (spatialRef.XWorldLimits[0] -
-                                            (min_Xgrid-pixelX/2))
-                                        ).tolist()
-                spatialRef.YWorldLimits = (np.array(spatialRef.YWorldLimits) -
-                                        (spatialRef.YWorldLimits[0] -
-                                            (min_Ygrid-pixelY/2))
-                                        ).tolist()
-                spatialRef.ZWorldLimits = (np.array(spatialRef.ZWorldLimits) -
-                                        (spatialRef.ZWorldLimits[0] -
-                                            (min_Zgrid-sliceS/2))
-                                        ).tolist()
-
-                # Converting the results into lists
-                spatialRef.ImageSize = spatialRef.ImageSize.tolist()
-                spatialRef.XIntrinsicLimits = spatialRef.XIntrinsicLimits.tolist()
-                spatialRef.YIntrinsicLimits = spatialRef.YIntrinsicLimits.tolist()
-                spatialRef.ZIntrinsicLimits = spatialRef.ZIntrinsicLimits.tolist()
+                spatialRef.XWorldLimits = spatialRef.XWorldLimits - (spatialRef.XWorldLimits[0] -
+                                                                        (min_Xgrid-pixelX/2))
+                spatialRef.YWorldLimits = spatialRef.YWorldLimits - (spatialRef.YWorldLimits[0] -
+                                                                        (min_Ygrid-pixelY/2))
+                spatialRef.ZWorldLimits = spatialRef.ZWorldLimits - (spatialRef.ZWorldLimits[0] -
+                                                                        (min_Zgrid-sliceS/2))
 
                 # update spatialRef
                 self.update_spatialRef(spatialRef)
@@ -1619,7 +1607,7 @@ class MEDimage(object):
                         roi_data = self.convert_to_LPS(data=roi.get_fdata())
                         roi_name = file[file.find("(")+1 : file.find(")")]
                         name_set = file[file.find("_")+2 : file.find("(")]
-                        self.update_indexes(key=roi_index, indexes=np.nonzero(roi_data.flatten()))
+                        self.update_indexes(key=roi_index, indexes=np.flatnonzero(roi_data))
                         self.update_name_set(key=roi_index, name_set=name_set)
                         self.update_roi_name(key=roi_index, ROIname=roi_name)
                         roi_index += 1
@@ -8,7 +8,7 @@ from copy import deepcopy
 import numpy as np
 from MEDimage.MEDimage import MEDimage
 
-from ..processing.segmentation import compute_box
+from ..processing.segmentation import compute_box_spatial_ref, parse_box_string
 from ..utils.image_volume_obj import image_volume_obj
 from ..utils.imref import imref3d, intrinsicToWorld, worldToIntrinsic
 from ..utils.interp3 import interp3
@@ -153,11 +153,13 @@ def interp_volume(MEDimage: MEDimage,
             (low_limits_q[2] - new_low_limits_q[2])
 
         # REDUCE THE SIZE OF THE VOLUME PRIOR TO INTERPOLATION
-        # TODO check that compute_box vol and roi are intended to be the same!
+        # Only the spatial reference of the box is needed here, the box itself
+        # is not extracted
         if use_box:
-            _, _, tempSpatialRef = compute_box(
-                vol=roi_obj_s.data, roi=roi_obj_s.data, spatial_ref=vol_obj_s.spatialRef,
-                box_string=box_string)
+            box_mode, box_value = parse_box_string(box_string)
+            _, tempSpatialRef = compute_box_spatial_ref(
+                roi=roi_obj_s.data, spatial_ref=vol_obj_s.spatialRef,
+                box_mode=box_mode, box_value=box_value)
 
             size_temp = tempSpatialRef.ImageSize
 
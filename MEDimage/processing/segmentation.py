@@ -4,16 +4,18 @@
 
 import logging
 from copy import deepcopy
+from enum import IntEnum
+from functools import lru_cache
 from typing import List, Sequence, Tuple, Union
 
 import numpy as np
 from MEDimage.MEDimage import MEDimage
 from nibabel import Nifti1Image
 from scipy.ndimage import center_of_mass
+from skimage.draw import polygon as sk_polygon
 
 from ..utils.image_volume_obj import image_volume_obj
-from ..utils.imref import imref3d, intrinsicToWorld, worldToIntrinsic
-from ..utils.inpolygon import inpolygon
+from ..utils.imref import imref3d, intrinsicToWorld
 from ..utils.interp3 import interp3
 from ..utils.mode import mode
 from ..utils.parse_contour_string import parse_contour_string
@@ -100,9 +102,7 @@ def get_roi_from_indexes(
             contour_string = contour_string + sign + \
                 str(contour_number[i].astype(int))
 
-        if not (box_string == "full" or "box" in box_string):
-            raise ValueError(
-                "The third argument must either be \"full\" or contain the word \"box\".")
+        box_mode, box_value = parse_box_string(box_string)
 
         contour_number, operations = parse_contour_string(contour_string)
 
@@ -133,7 +133,8 @@ def get_roi_from_indexes(
         # COMPUTING THE BOUNDING BOX
         vol, roi, new_spatial_ref = compute_box(vol=vol, roi=roi,
                                             spatial_ref=spatial_ref,
-                                            box_string=box_string)
+                                            box_mode=box_mode,
+                                            box_value=box_value)
 
         # ARRANGE OUTPUT
         vol_obj = image_volume_obj(data=vol, spatial_ref=new_spatial_ref)
@@ -245,35 +246,50 @@ def get_polygon_mask(roi_xyz: np.ndarray,
         spatial_ref (imref3d): imref3d object (same functionality of MATLAB imref3d class).
 
     Returns:
-        ndarray: 3D array of 1's and 0's defining the ROI mask.
+        ndarray: 3D array of 1's and 0's (uint8) defining the ROI mask.
+
+    Note:
+        As with MATLAB inpolygon, the voxels whose centers lie inside or on the
+        edge of a contour are in the ROI.
     """
 
     # COMPUTING MASK
     s_z = spatial_ref.ImageSize.copy()
-    roi_mask = np.zeros(s_z)
-    # X,Y,Z in intrinsic image coordinates
-    X, Y, Z = worldToIntrinsic(R=spatial_ref,
-                               xWorld=roi_xyz[:, 0],
-                               yWorld=roi_xyz[:, 1],
-                               zWorld=roi_xyz[:, 2])
-
-    points = np.transpose(np.vstack((X, Y, Z)))
-
-    K = np.round(points[:, 2])  # Must assign the points to one slice
-    closed_contours = np.unique(roi_xyz[:, 3])
-    x_q = np.arange(s_z[0])
-    y_q = np.arange(s_z[1])
-    x_q, y_q = np.meshgrid(x_q, y_q)
-
-    for c_c in np.arange(len(closed_contours)):
-        ind = roi_xyz[:, 3] == closed_contours[c_c]
+    roi_mask = np.zeros(s_z, dtype=np.uint8)
+    # X,Y,Z in intrinsic image coordinates, converted in a single vectorized
+    # operation: the origin is the world position of the first voxel center.
+    res = np.array([spatial_ref.PixelExtentInWorldX,
+                    spatial_ref.PixelExtentInWorldY,
+                    spatial_ref.PixelExtentInWorldZ])
+    origin = np.array([spatial_ref.XWorldLimits[0],
+                       spatial_ref.YWorldLimits[0],
+                       spatial_ref.ZWorldLimits[0]]) + 0.5*res
+    points = (roi_xyz[:, :3] - origin) / res
+
+    K = np.round(points[:, 2]).astype(int)  # Must assign the points to one slice
+
+    # Sorting the points by closed contour once (stable, to keep the vertex
+    # order), so that each closed contour is a contiguous segment
+    order = np.argsort(roi_xyz[:, 3], kind='stable')
+    labels = roi_xyz[order, 3]
+    closed_contours = np.unique(labels)
+    if closed_contours.size == 0:
+        return roi_mask
+    split_ind = np.searchsorted(labels, closed_contours[1:])
+    contour_points = np.split(points[order, :2], split_ind)
+    contour_slices = np.split(K[order], split_ind)
+
+    for contour, k_contour in zip(contour_points, contour_slices):
         # Taking the mode, just in case. But normally, numel(unique(K(ind)))
         # should evaluate to 1, as closed contours are meant to be defined on
-        # a given slice
-        select_slice = mode(K[ind]).astype(int)
-        inpoly = inpolygon(x_q=x_q, y_q=y_q, x_v=points[ind, 0], y_v=points[ind, 1])
-        roi_mask[:, :, select_slice] = np.logical_or(
-            roi_mask[:, :, select_slice], inpoly)
+        # a given slice. The slice indexes are integers in a small range, so
+        # the mode is given by the largest bin count.
+        k_min = np.min(k_contour)
+        select_slice = int(np.argmax(np.bincount(k_contour - k_min))) + k_min
+        # Scan-line fill: only the indexes of the pixels inside the contour are
+        # computed, and setting them is equivalent to a logical OR
+        rr, cc = sk_polygon(contour[:, 0], contour[:, 1], shape=(s_z[0], s_z[1]))
+        roi_mask[rr, cc, select_slice] = 1
 
     return roi_mask
 
@@ -424,12 +440,61 @@ def crop_box(image_data: np.ndarray,
     
     return image_data, roi_data
 
+class BoxMode(IntEnum):
+    """Type of box computed around the ROI (Region of interest), as parsed
+    from a ``box_string`` by :func:`parse_box_string()`.
+    """
+    FULL = 0  # 'full': full imaging data.
+    BOX = 1  # 'box': smallest bounding box.
+    BOX_ADD = 2  # Ex: 'box10': voxels added in all three dimensions.
+    BOX_MUL = 3  # Ex: '2box': multiplication of the size of the box.
+
+@lru_cache(maxsize=None)
+def parse_box_string(box_string: str) -> Tuple[BoxMode, float]:
+    """Parses the ``box_string`` once into the numeric parameters of :func:`compute_box()`.
+
+    Args:
+        box_string (str): Specifies the new box to be computed
+
+            * 'full': full imaging data as output.
+            * 'box': computes the smallest bounding box.
+            * Ex: 'box10' means 10 voxels in all three dimensions are added to the smallest bounding box. The number \
+                after 'box' defines the number of voxels to add.
+            * Ex: '2box' computes the smallest box and outputs double its \
+                size. The number before 'box' defines the multiplication in size.
+
+    Returns:
+        2-element tuple containing
+
+        - BoxMode: Type of box to compute.
+        - float: Number of voxels to add for ``BoxMode.BOX_ADD``, multiplication factor \
+            for ``BoxMode.BOX_MUL`` and 0 otherwise.
+
+    Raises:
+        ValueError: If ``box_string`` is neither "full" nor contains the word "box".
+    """
+    if "box" in box_string:
+        if box_string == "box":
+            return BoxMode.BOX, 0.0
+        # Always returns the first appearance
+        ind_box = box_string.find("box")
+        # Addition of a certain number of voxels in all dimensions
+        if ind_box == 0:
+            return BoxMode.BOX_ADD, float(box_string[(ind_box+3):])
+        # Multiplication of the size of the box
+        return BoxMode.BOX_MUL, float(box_string[0:ind_box])
+    elif box_string == "full":
+        return BoxMode.FULL, 0.0
+
+    raise ValueError("The box string must either be \"full\" or contain the word \"box\".")
+
 def compute_box(vol: np.ndarray,
                 roi: np.ndarray,
                 spatial_ref: imref3d,
-                box_string: str) -> Tuple[np.ndarray,
-                                          np.ndarray,
-                                          imref3d]:
+                box_mode: BoxMode,
+                box_value: float = 0.0) -> Tuple[np.ndarray,
+                                                 np.ndarray,
+                                                 imref3d]:
     """Computes a new box around the ROI (Region of interest) from the original box
     and updates the volume and the ``spatial_ref``.
 
@@ -437,120 +502,123 @@ def compute_box(vol: np.ndarray,
         vol (ndarray): ROI mask with values of 0 and 1.
         roi (ndarray): ROI mask with values of 0 and 1.
         spatial_ref (imref3d): imref3d object (same functionality of MATLAB imref3d class).
-        box_string (str): Specifies the new box to be computed
+        box_mode (BoxMode): Specifies the new box to be computed, see :func:`parse_box_string()`.
+
+            * BoxMode.FULL: full imaging data as output.
+            * BoxMode.BOX: computes the smallest bounding box.
+            * BoxMode.BOX_ADD: ``box_value`` voxels in all three dimensions are added to \
+                the smallest bounding box.
+            * BoxMode.BOX_MUL: computes the smallest box and outputs its size multiplied \
+                by ``box_value``.
+        box_value (float, optional): Number of voxels to add or multiplication factor, \
+            depending on ``box_mode``.
 
-            * 'full': full imaging data as output.
-            * 'box': computes the smallest bounding box.
-            * Ex: 'box10' means 10 voxels in all three dimensions are added to the smallest bounding box. The number \
-                after 'box' defines the number of voxels to add.
-            * Ex: '2box' computes the smallest box and outputs double its \
-                size. The number before 'box' defines the multiplication in size.
-    
     Returns: 
         3-element tuple containing
 
         - ndarray: 3D array of imaging data defining the smallest box containing the ROI.
-        - ndarray: 3D array of 1's and 0's defining the ROI in ROIbox.
+        - ndarray: 3D array of 1's and 0's (uint8) defining the ROI in ROIbox.
         - imref3d: The associated imref3d object imaging data.
-
-    Todo:
-        * I would not recommend parsing different settings into a string. \
-            Provide two or more parameters instead, and use None if one or more \
-            are not used.
-        * There is no else statement, so "new_spatial_ref" might be unset
     """
+    # The mask only holds 0's and 1's, so it is stored on a single byte per voxel
+    roi = roi.astype(np.uint8, copy=False)
 
-    if "box" in box_string:
-        comp = box_string == "box"
-        box_bound = compute_bounding_box(mask=roi)
-        if not comp:
-            # Always returns the first appearance
-            ind_box = box_string.find("box")
-            # Addition of a certain number of voxels in all dimensions
-            if ind_box == 0:
-                n_v = float(box_string[(ind_box+3):])
-                n_v = np.array([n_v, n_v, n_v]).astype(int)
-            else:  # Multiplication of the size of the box
-                factor = float(box_string[0:ind_box])
-                size_box = np.diff(box_bound, axis=1) + 1
-                new_box = size_box * factor
-                n_v = np.round((new_box - size_box)/2.0).astype(int)
-
-            o_k = False
-
-            while not o_k:
-                border = np.zeros([3, 2])
-                border[0, 0] = box_bound[0, 0] - n_v[0]
-                border[0, 1] = box_bound[0, 1] + n_v[0]
-                border[1, 0] = box_bound[1, 0] - n_v[1]
-                border[1, 1] = box_bound[1, 1] + n_v[1]
-                border[2, 0] = box_bound[2, 0] - n_v[2]
-                border[2, 1] = box_bound[2, 1] + n_v[2]
-                border = border + 1
-                check1 = np.sum(border[:, 0] > 0)
-                check2 = border[0, 1] <= vol.shape[0]
-                check3 = border[1, 1] <= vol.shape[1]
-                check4 = border[2, 1] <= vol.shape[2]
-
-                check = check1 + check2 + check3 + check4
-
-                if check == 6:
-                    o_k = True
-                else:
-                    n_v = np.floor(n_v / 2.0)
-                    if np.sum(n_v) == 0.0:
-                        o_k = True
-                        n_v = [0.0, 0.0, 0.0]
-        else:
-            # Will compute the smallest bounding box possible
-            n_v = [0.0, 0.0, 0.0]
-
-        box_bound[0, 0] -= n_v[0]
-        box_bound[0, 1] += n_v[0]
-        box_bound[1, 0] -= n_v[1]
-        box_bound[1, 1] += n_v[1]
-        box_bound[2, 0] -= n_v[2]
-        box_bound[2, 1] += n_v[2]
-
-        box_bound = box_bound.astype(int)
-
-        vol = vol[box_bound[0, 0]:box_bound[0, 1] + 1,
-                  box_bound[1, 0]:box_bound[1, 1] + 1,
-                  box_bound[2, 0]:box_bound[2, 1] + 1]
-        roi = roi[box_bound[0, 0]:box_bound[0, 1] + 1,
-                  box_bound[1, 0]:box_bound[1, 1] + 1,
-                  box_bound[2, 0]:box_bound[2, 1] + 1]
-
-        # Resolution in mm, nothing has changed here in terms of resolution;
-        # XYZ format here.
-        res = np.array([spatial_ref.PixelExtentInWorldX,
-                        spatial_ref.PixelExtentInWorldY,
-                        spatial_ref.PixelExtentInWorldZ])
-
-        # IJK, as required by imref3d
-        size_box = (np.diff(box_bound, axis=1) + 1).tolist()
-        size_box[0] = size_box[0][0]
-        size_box[1] = size_box[1][0]
-        size_box[2] = size_box[2][0]
-        x_limit, y_limit, z_limit = intrinsicToWorld(spatial_ref, 
-                                                box_bound[0, 0],
-                                                box_bound[1, 0],
-                                                box_bound[2, 0])
-        new_spatial_ref = imref3d(size_box, res[0], res[1], res[2])
-
-        # The limit is defined as the border of the first pixel
-        new_spatial_ref.XWorldLimits = new_spatial_ref.XWorldLimits - (
-            new_spatial_ref.XWorldLimits[0] - (x_limit - res[0]/2))
-        new_spatial_ref.YWorldLimits = new_spatial_ref.YWorldLimits - (
-            new_spatial_ref.YWorldLimits[0] - (y_limit - res[1]/2))
-        new_spatial_ref.ZWorldLimits = new_spatial_ref.ZWorldLimits - (
-            new_spatial_ref.ZWorldLimits[0] - (z_limit - res[2]/2))
-
-    elif "full" in box_string:
-        new_spatial_ref = spatial_ref
+    if box_mode == BoxMode.FULL:
+        return vol, roi, spatial_ref
+
+    box_bound, new_spatial_ref = compute_box_spatial_ref(roi=roi,
+                                                         spatial_ref=spatial_ref,
+                                                         box_mode=box_mode,
+                                                         box_value=box_value)
+
+    vol = vol[box_bound[0, 0]:box_bound[0, 1] + 1,
+              box_bound[1, 0]:box_bound[1, 1] + 1,
+              box_bound[2, 0]:box_bound[2, 1] + 1]
+    roi = roi[box_bound[0, 0]:box_bound[0, 1] + 1,
+              box_bound[1, 0]:box_bound[1, 1] + 1,
+              box_bound[2, 0]:box_bound[2, 1] + 1]
+
+    # The box is a strided view of the full volume, copying it to
+    # contiguous memory speeds up the downstream kernels.
+    vol = np.ascontiguousarray(vol)
+    roi = np.ascontiguousarray(roi)
 
     return vol, roi, new_spatial_ref
 
+def compute_box_spatial_ref(roi: np.ndarray,
+                            spatial_ref: imref3d,
+                            box_mode: BoxMode,
+                            box_value: float = 0.0) -> Tuple[np.ndarray,
+                                                             imref3d]:
+    """Computes the bounds and the ``spatial_ref`` of the new box around the ROI
+    (Region of interest), without extracting the box from the volume.
+
+    Args:
+        roi (ndarray): ROI mask with values of 0 and 1.
+        spatial_ref (imref3d): imref3d object (same functionality of MATLAB imref3d class).
+        box_mode (BoxMode): Specifies the new box to be computed, see :func:`compute_box()`.
+        box_value (float, optional): Number of voxels to add or multiplication factor, \
+            depending on ``box_mode``.
+
+    Returns:
+        2-element tuple containing
+
+        - ndarray: (3, 2) array of the first and last indexes of the box in all dimensions.
+        - imref3d: The associated imref3d object of the box.
+    """
+    if box_mode == BoxMode.FULL:
+        box_bound = np.stack((np.zeros(3, dtype=int), np.array(roi.shape) - 1), axis=1)
+        return box_bound, spatial_ref
+
+    box_bound = compute_bounding_box(mask=roi)
+    if box_mode != BoxMode.BOX:
+        if box_mode == BoxMode.BOX_ADD:
+            n_v = np.full(3, int(box_value))
+        else:
+            size_box = np.diff(box_bound, axis=1) + 1
+            new_box = size_box * box_value
+            n_v = np.round((new_box - size_box)/2.0).astype(int)
+
+        # The number of voxels to add is halved until the new box fits in
+        # the volume, i.e. the smallest s >= 0 such that n_v // 2**s does
+        # not exceed the margin left on each side of the bounding box.
+        n_v = np.ravel(n_v)
+        margin = np.minimum(box_bound[:, 0], np.array(roi.shape) - 1 - box_bound[:, 1])
+        n_halvings = np.ceil(np.log2(np.maximum(n_v + 1, 1) / (margin + 1)))
+        n_v = n_v // 2**int(np.max(n_halvings, initial=0))
+    else:
+        # Will compute the smallest bounding box possible
+        n_v = np.zeros(3, dtype=int)
+
+    box_bound = (box_bound + np.stack((-n_v, n_v), axis=1)).astype(int)
+
+    # Resolution in mm, nothing has changed here in terms of resolution;
+    # XYZ format here.
+    res = np.array([spatial_ref.PixelExtentInWorldX,
+                    spatial_ref.PixelExtentInWorldY,
+                    spatial_ref.PixelExtentInWorldZ])
+
+    # IJK, as required by imref3d
+    size_box = (np.diff(box_bound, axis=1) + 1).tolist()
+    size_box[0] = size_box[0][0]
+    size_box[1] = size_box[1][0]
+    size_box[2] = size_box[2][0]
+    x_limit, y_limit, z_limit = intrinsicToWorld(spatial_ref, 
+                                            box_bound[0, 0],
+                                            box_bound[1, 0],
+                                            box_bound[2, 0])
+    new_spatial_ref = imref3d(size_box, res[0], res[1], res[2])
+
+    # The limit is defined as the border of the first pixel
+    new_spatial_ref.XWorldLimits = new_spatial_ref.XWorldLimits - (
+        new_spatial_ref.XWorldLimits[0] - (x_limit - res[0]/2))
+    new_spatial_ref.YWorldLimits = new_spatial_ref.YWorldLimits - (
+        new_spatial_ref.YWorldLimits[0] - (y_limit - res[1]/2))
+    new_spatial_ref.ZWorldLimits = new_spatial_ref.ZWorldLimits - (
+        new_spatial_ref.ZWorldLimits[0] - (z_limit - res[2]/2))
+
+    return box_bound, new_spatial_ref
+
 def compute_bounding_box(mask:np.ndarray) -> np.ndarray:
     """Computes the indexes of the ROI (Region of interest) enclosing box 
     in all dimensions.
@@ -562,17 +630,20 @@ def compute_bounding_box(mask:np.ndarray) -> np.ndarray:
         ndarray: An array containing the indexes of the bounding box.
     """
 
-    indices = np.where(np.reshape(mask, np.size(mask), order='F') == 1)
-    iv, jv, kv = np.unravel_index(indices, np.shape(mask), order='F')
-    box_bound = np.zeros((3, 2))
-    box_bound[0, 0] = np.min(iv)
-    box_bound[0, 1] = np.max(iv)
-    box_bound[1, 0] = np.min(jv)
-    box_bound[1, 1] = np.max(jv)
-    box_bound[2, 0] = np.min(kv)
-    box_bound[2, 1] = np.max(kv)
+    # Projections of the mask on each axis, using reductions rather than
+    # listing the coordinates of all the ROI voxels
+    mask_xy = np.any(mask, axis=2)
+    projections = [np.any(mask_xy, axis=1),
+                   np.any(mask_xy, axis=0),
+                   np.any(mask, axis=(0, 1))]
+
+    box_bound = np.zeros((3, 2), dtype=int)
+    for axis in range(3):
+        ind = np.flatnonzero(projections[axis])
+        box_bound[axis, 0] = ind[0]
+        box_bound[axis, 1] = ind[-1]
 
-    return box_bound.astype(int)
+    return box_bound
 
 def get_roi(MEDimage: MEDimage,
             name_roi: str,
@@ -649,9 +720,7 @@ def get_roi(MEDimage: MEDimage,
             contour_string = contour_string + sign + \
                 str(contour_number[i].astype(int))
 
-        if not (box_string == "full" or "box" in box_string):
-            raise ValueError(
-                "The third argument must either be \"full\" or contain the word \"box\".")
+        box_mode, box_value = parse_box_string(box_string)
 
         if type(interp) != bool:
             raise ValueError(
@@ -702,10 +771,14 @@ def get_roi(MEDimage: MEDimage,
                                         spatial_ref=spatial_ref,
                                         orientation=MEDimage.scan.orientation,
                                         scan_type=MEDimage.type,
-                                        interp=interp).astype(np.float32)]
+                                        interp=interp)]
 
         # APPLYING OPERATIONS ON ALL MASKS
+        # The masks are only promoted to float32 when operations are applied,
+        # as the uint8 subtraction would wrap
         roi = roi_mask_list[0]
+        if n_contour > 1:
+            roi = roi.astype(np.float32)
         for c in np.arange(start=1, stop=n_contour):
             if operations[c-1] == "+":
                 roi += roi_mask_list[c]
@@ -721,7 +794,8 @@ def get_roi(MEDimage: MEDimage,
         vol, roi, new_spatial_ref = compute_box(vol=vol, 
                                             roi=roi,
                                             spatial_ref=spatial_ref,
-                                            box_string=box_string)
+                                            box_mode=box_mode,
+                                            box_value=box_value)
 
         # ARRANGE OUTPUT
         vol_obj = image_volume_obj(data=vol, spatial_ref=new_spatial_ref)
@@ -460,7 +460,7 @@ class DataManager(object):
                 roi_data = MEDimg.scan.ROI.convert_to_LPS(data=roi.get_fdata())
                 roi_name = file.name[file.name.find("(") + 1 : file.name.find(")")]
                 name_set = file.name[file.name.find("_") + 2 : file.name.find("(")]
-                MEDimg.scan.ROI.update_indexes(key=roi_index, indexes=np.nonzero(roi_data.flatten()))
+                MEDimg.scan.ROI.update_indexes(key=roi_index, indexes=np.flatnonzero(roi_data))
                 MEDimg.scan.ROI.update_name_set(key=roi_index, name_set=name_set)
                 MEDimg.scan.ROI.update_roi_name(key=roi_index, roi_name=roi_name)
                 roi_index += 1
@@ -490,24 +490,12 @@ class DataManager(object):
         min_z_grid = min_grid[2]
         size_image = np.shape(nifti_data)
         spatialRef = imref3d(size_image, abs(pixel_x), abs(pixel_y), abs(slices))
-        spatialRef.XWorldLimits = (np.array(spatialRef.XWorldLimits) -
-                                (spatialRef.XWorldLimits[0] -
-                                    (min_x_grid-pixel_x/2))
-                                ).tolist()
-        spatialRef.YWorldLimits = (np.array(spatialRef.YWorldLimits) -
-                                (spatialRef.YWorldLimits[0] -
-                                    (min_y_grid-pixel_y/2))
-                                ).tolist()
-        spatialRef.ZWorldLimits = (np.array(spatialRef.ZWorldLimits) -
-                                (spatialRef.ZWorldLimits[0] -
-                                    (min_z_grid-slices/2))
-                                ).tolist()
-
-        # Converting the results into lists
-        spatialRef.ImageSize = spatialRef.ImageSize.tolist()
-        spatialRef.XIntrinsicLimits = spatialRef.XIntrinsicLimits.tolist()
-        spatialRef.YIntrinsicLimits = spatialRef.YIntrinsicLimits.tolist()
-        spatialRef.ZIntrinsicLimits = spatialRef.ZIntrinsicLimits.tolist()
+        spatialRef.XWorldLimits = spatialRef.XWorldLimits - (spatialRef.XWorldLimits[0] -
+                                                                (min_x_grid-pixel_x/2))
+        spatialRef.YWorldLimits = spatialRef.YWorldLimits - (spatialRef.YWorldLimits[0] -
+                                                                (min_y_grid-pixel_y/2))
+        spatialRef.ZWorldLimits = spatialRef.ZWorldLimits - (spatialRef.ZWorldLimits[0] -
+                                                                (min_z_grid-slices/2))
 
         # update spatialRef in the volume sub-class
         MEDimg.scan.volume.update_spatialRef(spatialRef)
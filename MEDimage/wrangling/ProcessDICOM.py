@@ -3,6 +3,7 @@
 
 import sys
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Union
 
 import numpy as np
@@ -48,6 +49,53 @@ class ProcessDICOM():
         self.path_save = Path(path_save) if path_save is str else path_save
         self.save = save
     
+    def __read_dicom_files(
+        self,
+        dicom_files: List[Path],
+        stop_before_pixels: bool = False,
+        remove_private_tags: bool = False,
+        max_workers: int = 8) -> List[pydicom.dataset.FileDataset]:
+        """
+        Reads the given dicom files concurrently, since parsing is dominated by file I/O.
+
+        Args:
+            dicom_files (List[Path]): List of paths to the dicom files.
+            stop_before_pixels (bool): Whether to stop reading before the pixel data or not.
+            remove_private_tags (bool): Whether to remove the private tags of each dataset
+                as soon as it is read or not.
+            max_workers (int): Maximum number of reading threads. Kept small, since
+                patients are already processed in parallel by ray tasks.
+
+        Returns:
+            List[pydicom.dataset.FileDataset]: List of dicom datasets, in the same order as ``dicom_files``.
+        """
+        def read_dicom_file(dicom_file: Path) -> pydicom.dataset.FileDataset:
+            dataset = pydicom.dcmread(str(dicom_file), stop_before_pixels=stop_before_pixels, force=True)
+            if remove_private_tags:
+                dataset.remove_private_tags()
+            return dataset
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(dicom_files)))) as executor:
+            return list(executor.map(read_dicom_file, dicom_files))
+
+    def __strip_pixel_data(self, dataset: pydicom.dataset.FileDataset) -> None:
+        """
+        Removes the pixel data and the elements following it from a dataset and releases
+        its cached pixel array, leaving the same header as reading it with ``stop_before_pixels``.
+
+        Args:
+            dataset (pydicom.dataset.FileDataset): Dicom dataset, modified in place.
+
+        Returns:
+            None.
+        """
+        pixel_data_tag = pydicom.tag.Tag(0x7FE0, 0x0010)  # PixelData
+        for tag in [tag for tag in dataset.keys() if tag >= pixel_data_tag]:
+            del dataset[tag]
+        # Releases the cached pixel array, the attribute itself is kept since
+        # pydicom reads it directly
+        dataset._pixel_array = None
+
     def __get_dicom_scan_orientation(self, dicom_header: List[pydicom.dataset.FileDataset]) -> str:
         """
         Get the orientation of the scan.
@@ -334,8 +382,7 @@ class ProcessDICOM():
 
         # IMAGING DATA AND ROI DEFINITION (if applicable)
         # Reading DICOM images and headers
-        dicom_hi = [pydicom.dcmread(str(dicom_file), force=True)
-                for dicom_file in self.path_images]
+        dicom_hi = self.__read_dicom_files(self.path_images)
 
         try:
             # Determination of the scan orientation
@@ -367,43 +414,29 @@ class ProcessDICOM():
             min_z_grid = min_grid[2]
             size_image = np.shape(voxel_ndarray)
             spatial_ref = imref3d(size_image, pixel_x, pixel_y, slice_s)
-            spatial_ref.XWorldLimits = (np.array(spatial_ref.XWorldLimits) -
-                                    (spatial_ref.XWorldLimits[0] -
-                                        (min_x_grid-pixel_x/2))).tolist()
-            spatial_ref.YWorldLimits = (np.array(spatial_ref.YWorldLimits) -
-                                    (spatial_ref.YWorldLimits[0] -
-                                        (min_y_grid-pixel_y/2))).tolist()
-            spatial_ref.ZWorldLimits = (np.array(spatial_ref.ZWorldLimits) -
-                                    (spatial_ref.ZWorldLimits[0] -
-                                        (min_z_grid-slice_s/2))).tolist()
-
-            # Converting the results into lists
-            spatial_ref.ImageSize = spatial_ref.ImageSize.tolist()
-            spatial_ref.XIntrinsicLimits = spatial_ref.XIntrinsicLimits.tolist()
-            spatial_ref.YIntrinsicLimits = spatial_ref.YIntrinsicLimits.tolist()
-            spatial_ref.ZIntrinsicLimits = spatial_ref.ZIntrinsicLimits.tolist()
+            spatial_ref.XWorldLimits = spatial_ref.XWorldLimits - (spatial_ref.XWorldLimits[0] -
+                                                                    (min_x_grid-pixel_x/2))
+            spatial_ref.YWorldLimits = spatial_ref.YWorldLimits - (spatial_ref.YWorldLimits[0] -
+                                                                    (min_y_grid-pixel_y/2))
+            spatial_ref.ZWorldLimits = spatial_ref.ZWorldLimits - (spatial_ref.ZWorldLimits[0] -
+                                                                    (min_z_grid-slice_s/2))
 
             # Update the spatial reference in the MEDimage class
             MEDimg.scan.volume.spatialRef = spatial_ref
             
             # DICOM HEADERS OF IMAGING DATA
-            dicom_h = [
-                pydicom.dcmread(str(dicom_file),stop_before_pixels=True,force=True) for dicom_file in self.path_images
-                ]
-            for i in range(0, len(dicom_h)):
-                dicom_h[i].remove_private_tags()
+            # The voxel data is already extracted, so the headers are the datasets
+            # already read, stripped of their pixel data, instead of a second read
+            dicom_h = dicom_hi
+            for dicom in dicom_h:
+                self.__strip_pixel_data(dicom)
+                dicom.remove_private_tags()
             MEDimg.dicomH = dicom_h
 
             # DICOM RTstruct (if applicable)
             if self.path_rs is not None and len(self.path_rs) > 0:
-                dicom_rs_full = [
-                    pydicom.dcmread(str(dicom_file),
-                                    stop_before_pixels=True,
-                                    force=True)
-                    for dicom_file in self.path_rs
-                ]
-                for i in range(0, len(dicom_rs_full)):
-                    dicom_rs_full[i].remove_private_tags()
+                dicom_rs_full = self.__read_dicom_files(self.path_rs, stop_before_pixels=True,
+                                                        remove_private_tags=True)
 
             # GATHER XYZ POINTS OF ROIs USING RTstruct
             n_rs = len(dicom_rs_full) if type(dicom_rs_full) is list else dicom_rs_full
@@ -415,7 +448,6 @@ class ProcessDICOM():
                         if dicom_rs_full[rs].StructureSetROISequence[roi].ROIName == \
                                 dicom_rs_full[rs].StructureSetROISequence[roi-1].ROIName:
                             continue
-                    points = []
                     name_set_strings = ['StructureSetName', 'StructureSetDescription',
                                     'series_description', 'SeriesInstanceUID']
                     for name_field in name_set_strings:
@@ -434,31 +466,28 @@ class ProcessDICOM():
                                                     nameSetInfo=name_set_info)
                     
                     try:
-                        n_closed_contour = len(dicom_rs_full[rs].ROIContourSequence[roi].ContourSequence)
-                        ind_closed_contour = []
-                        for s in range(0, n_closed_contour):
-                            # points stored in the RTstruct file for a given closed
-                            # contour (beware: there can be multiple closed contours
-                            # on a given slice).
-                            pts_temp = dicom_rs_full[rs].ROIContourSequence[roi].ContourSequence[s].ContourData
-                            n_points = int(len(pts_temp) / 3)
-                            if len(pts_temp) > 0:
-                                ind_closed_contour = ind_closed_contour + np.tile(s, n_points).tolist()
-                                if type(points) == list:
-                                    points = np.reshape(np.transpose(pts_temp),(n_points, 3))
-                                else:
-                                    points = np.concatenate(
-                                            (points, np.reshape(np.transpose(pts_temp), (n_points, 3))),
-                                            axis=0
-                                            )
+                        contour_sequence = dicom_rs_full[rs].ROIContourSequence[roi].ContourSequence
+                        # points stored in the RTstruct file for a given closed
+                        # contour (beware: there can be multiple closed contours
+                        # on a given slice). A first pass over the sequence sizes
+                        # the buffers so that the points are copied only once.
+                        n_points = np.array([int(len(contour.ContourData) / 3) for contour in contour_sequence])
+                        n_points_total = int(np.sum(n_points))
+                        if n_points_total == 0:
+                            raise ValueError('No contour data found for this ROI.')
+                        # XYZ points in the first three columns and the index of
+                        # their closed contour in the last one
+                        points = np.empty((n_points_total, 4))
+                        points[:, 3] = np.repeat(np.arange(len(contour_sequence)), n_points)
+                        offset = 0
+                        for s in range(0, len(contour_sequence)):
+                            if n_points[s] > 0:
+                                pts_temp = contour_sequence[s].ContourData
+                                points[offset:offset + n_points[s], :3] = np.reshape(
+                                    np.asarray(pts_temp, dtype=np.float64), (n_points[s], 3))
+                                offset += n_points[s]
                         # Save the XYZ points in the MEDimage class
-                        MEDimg.scan.ROI.update_indexes(
-                                                    key=contour_num, 
-                                                    indexes=np.concatenate(
-                                                            (points, 
-                                                            np.reshape(ind_closed_contour, (len(ind_closed_contour), 1))),
-                                                    axis=1)
-                                                    )
+                        MEDimg.scan.ROI.update_indexes(key=contour_num, indexes=points)
                         # Compute the ROI box
                         _, roi_obj = get_roi(
                                         MEDimg,
@@ -467,7 +496,7 @@ class ProcessDICOM():
                                         )
 
                         # Save the ROI box non-zero indexes in the MEDimage class
-                        MEDimg.scan.ROI.update_indexes(key=contour_num, indexes=np.nonzero(roi_obj.data.flatten()))
+                        MEDimg.scan.ROI.update_indexes(key=contour_num, indexes=np.flatnonzero(roi_obj.data))
 
                     except Exception as e:
                         print('patientID: ' + dicom_hi[0].PatientID + ' error: ' + str(e) + ' n_roi: ' + str(roi) + ' n_rs:' + str(rs))
@@ -0,0 +1,116 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+MODULE_DIR = os.path.dirname(os.path.abspath('./MEDimage/'))
+sys.path.append(MODULE_DIR)
+
+from MEDimage.processing.segmentation import (BoxMode, compute_box,
+                                              compute_box_spatial_ref,
+                                              compute_bounding_box,
+                                              get_polygon_mask,
+                                              parse_box_string)
+from MEDimage.utils.imref import imref3d
+
+
+def test_polygon_mask_grid_aligned():
+    # 16x16x3 voxels of 1 mm, the first voxel center is at (0.5, 0.5, 0.5)
+    spatial_ref = imref3d([16, 16, 3], 1.0, 1.0, 1.0)
+    # Contours on slice 1, with vertices on voxel centers: the voxels on the
+    # edges are in the ROI
+    square = np.array([[2.5, 2.5, 1.5, 0],
+                       [8.5, 2.5, 1.5, 0],
+                       [8.5, 8.5, 1.5, 0],
+                       [2.5, 8.5, 1.5, 0]])
+    mask = get_polygon_mask(square, spatial_ref)
+    assert mask.dtype == np.uint8
+    assert np.sum(mask) == 49
+    assert np.all(mask[2:9, 2:9, 1] == 1)
+
+    triangle = np.array([[2.5, 2.5, 1.5, 0],
+                         [12.5, 2.5, 1.5, 0],
+                         [2.5, 12.5, 1.5, 0]])
+    mask = get_polygon_mask(triangle, spatial_ref)
+    assert np.sum(mask) == 66
+    assert np.all(mask[:, :, [0, 2]] == 0)
+
+def test_polygon_mask_outside_image():
+    spatial_ref = imref3d([16, 16, 3], 1.0, 1.0, 1.0)
+    # Contour leaving the image: it is clipped to the slice
+    square = np.array([[-4.5, -4.5, 2.5, 0],
+                       [5.5, -4.5, 2.5, 0],
+                       [5.5, 5.5, 2.5, 0],
+                       [-4.5, 5.5, 2.5, 0]])
+    mask = get_polygon_mask(square, spatial_ref)
+    assert np.sum(mask) == 36
+    assert np.all(mask[0:6, 0:6, 2] == 1)
+
+    # Contour entirely outside the image
+    square = np.array([[20.5, 20.5, 1.5, 0],
+                       [25.5, 20.5, 1.5, 0],
+                       [25.5, 25.5, 1.5, 0],
+                       [20.5, 25.5, 1.5, 0]])
+    mask = get_polygon_mask(square, spatial_ref)
+    assert np.sum(mask) == 0
+
+def test_parse_box_string():
+    assert parse_box_string("full") == (BoxMode.FULL, 0.0)
+    assert parse_box_string("box") == (BoxMode.BOX, 0.0)
+    assert parse_box_string("box10") == (BoxMode.BOX_ADD, 10.0)
+    assert parse_box_string("2box") == (BoxMode.BOX_MUL, 2.0)
+    with pytest.raises(ValueError):
+        parse_box_string("roi")
+
+def test_compute_box():
+    vol = np.arange(20*20*20, dtype=np.float32).reshape((20, 20, 20))
+    roi = np.zeros((20, 20, 20))
+    roi[5:8, 6:10, 7:12] = 1
+    spatial_ref = imref3d([20, 20, 20], 1.0, 2.0, 3.0)
+
+    vol_box, roi_box, new_spatial_ref = compute_box(vol, roi, spatial_ref, BoxMode.FULL)
+    assert vol_box.shape == (20, 20, 20)
+    assert roi_box.dtype == np.uint8
+    assert new_spatial_ref is spatial_ref
+
+    vol_box, roi_box, new_spatial_ref = compute_box(vol, roi, spatial_ref, BoxMode.BOX)
+    assert np.array_equal(vol_box, vol[5:8, 6:10, 7:12])
+    assert np.all(roi_box == 1)
+    assert roi_box.flags['C_CONTIGUOUS'] and vol_box.flags['C_CONTIGUOUS']
+    assert np.array_equal(new_spatial_ref.ImageSize, [3, 4, 5])
+    assert new_spatial_ref.XWorldLimits[0] == spatial_ref.XWorldLimits[0] + 5*1.0
+    assert new_spatial_ref.YWorldLimits[0] == spatial_ref.YWorldLimits[0] + 6*2.0
+    assert new_spatial_ref.ZWorldLimits[0] == spatial_ref.ZWorldLimits[0] + 7*3.0
+
+    vol_box, roi_box, _ = compute_box(vol, roi, spatial_ref, BoxMode.BOX_ADD, 2)
+    assert np.array_equal(vol_box, vol[3:10, 4:12, 5:14])
+    assert np.sum(roi_box) == np.sum(roi)
+
+    # 10 voxels do not fit on all sides, the margin is halved to 5 voxels
+    vol_box, _, _ = compute_box(vol, roi, spatial_ref, BoxMode.BOX_ADD, 10)
+    assert np.array_equal(vol_box, vol[0:13, 1:15, 2:17])
+
+    vol_box, _, _ = compute_box(vol, roi, spatial_ref, BoxMode.BOX_MUL, 2)
+    assert np.array_equal(vol_box, vol[3:10, 4:12, 5:14])
+
+def test_box_margin_halving():
+    # The number of voxels to add is halved until the box fits in the volume,
+    # the closed form must match the original iterative halving
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        shape = tuple(rng.integers(3, 30, 3))
+        roi = np.zeros(shape, dtype=np.uint8)
+        roi[tuple(rng.integers(0, s, 2) for s in shape)] = 1
+        spatial_ref = imref3d(list(shape), 1.0, 1.0, 1.0)
+        n_add = int(rng.integers(0, 40))
+
+        box_bound = compute_bounding_box(roi)
+        n_v = np.full(3, n_add)
+        while np.sum(n_v) > 0 and (np.any(box_bound[:, 0] - n_v < 0) or
+                                   np.any(box_bound[:, 1] + n_v > np.array(shape) - 1)):
+            n_v = n_v // 2
+        expected = box_bound + np.stack((-n_v, n_v), axis=1)
+
+        new_box_bound, _ = compute_box_spatial_ref(roi, spatial_ref, BoxMode.BOX_ADD, n_add)
+        assert np.array_equal(new_box_bound, expected)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pydicom
+from pydicom.data import get_testdata_files
+
+MODULE_DIR = os.path.dirname(os.path.abspath('./MEDimage/'))
+sys.path.append(MODULE_DIR)
+
+from MEDimage.wrangling.ProcessDICOM import ProcessDICOM
+
+
+def test_strip_pixel_data():
+    dicom_file = get_testdata_files("CT_small.dcm")[0]
+    process_dicom = ProcessDICOM(
+                        path_images=[dicom_file],
+                        path_rs=[],
+                        path_save=None,
+                        save=False
+                        )
+    # Read and strip the image datasets, as done for the DICOM headers
+    datasets = process_dicom._ProcessDICOM__read_dicom_files([dicom_file, dicom_file])
+    datasets[0].pixel_array
+    for dataset in datasets:
+        process_dicom._ProcessDICOM__strip_pixel_data(dataset)
+    header = pydicom.dcmread(dicom_file, stop_before_pixels=True, force=True)
+
+    for dataset in datasets:
+        assert list(dataset.keys()) == list(header.keys())
+        assert dataset._pixel_array is None